@@ -12,6 +12,12 @@ import random
 from urllib.parse import urlparse
 import re
 
+from marketplaces import (
+    MARKETPLACES, convert_price, get_marketplace, get_price_pattern, get_selectors,
+    is_rating_text, is_review_text, parse_price, parse_rating
+)
+from structured_data import extract_structured_data
+
 class AmazonScraper:
     def __init__(self):
         self.session = requests.Session()
@@ -27,8 +33,7 @@ class AmazonScraper:
     
     def is_amazon_url(self, url):
         """Check if URL is from Amazon"""
-        parsed_url = urlparse(url)
-        return 'amazon.com' in parsed_url.netloc or 'amazon.ca' in parsed_url.netloc or 'amazon.co.uk' in parsed_url.netloc
+        return get_marketplace(urlparse(url).netloc) is not None
     
     def scrape_product(self, url):
         """
@@ -50,19 +55,35 @@ class AmazonScraper:
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
             
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if self._is_captcha_page(response.content):
+                return {
+                    'error': 'Blocked by CAPTCHA',
+                    'message': 'Amazon returned a CAPTCHA page instead of the product',
+                    'url': url
+                }
+            
+            # Read embedded structured data first, falling back to the DOM
+            marketplace = get_marketplace(urlparse(url).netloc)
+            fields = self._extract_fields(response.content, marketplace)
             
             # Extract product data
             product_data = {
                 'url': url,
                 'domain': urlparse(url).netloc,
+                'country': marketplace['country'],
                 'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'title': self._scrape_title(soup),
-                'price': self._scrape_price(soup),
-                'image': self._scrape_image(soup),
-                'ratings': self._scrape_ratings(soup),
-                'description': self._scrape_description(soup)
+                'title': fields['title'],
+                'price': fields['price'],
+                'currency': fields['currency'],
+                'price_value': fields['price_value'],
+                'price_base': convert_price(fields['price_value'], fields['currency']),
+                'image': fields['image'],
+                'images': fields['images'],
+                'ratings': fields['ratings'],
+                'rating_value': fields['rating_value'],
+                'description': fields['description'],
+                'asin': fields['asin'],
+                'variant_prices': fields['variant_prices']
             }
             
             return product_data
@@ -80,10 +101,56 @@ class AmazonScraper:
                 'url': url
             }
     
-    def _scrape_title(self, soup):
+    def _is_captcha_page(self, content):
+        """Check for Amazon's robot check page"""
+        return b'/errors/validateCaptcha' in content
+    
+    def _extract_fields(self, content, marketplace=None):
+        """
+        Extract product fields from embedded JSON-LD/a-state data,
+        only building a BeautifulSoup tree for fields it doesn't cover
+        """
+        structured = extract_structured_data(content)
+        soup = None
+        
+        fields = {}
+        dom_scrapers = {
+            'title': self._scrape_title,
+            'price': self._scrape_price,
+            'image': self._scrape_image,
+            'ratings': self._scrape_ratings,
+            'description': self._scrape_description
+        }
+        for field, scrape in dom_scrapers.items():
+            value = structured.get(field)
+            if not value:
+                if soup is None:
+                    soup = BeautifulSoup(content, 'html.parser')
+                value = scrape(soup, marketplace)
+            fields[field] = value
+        
+        # Prefer the numeric price from structured data over re-parsing the display string
+        if fields['price'] == structured.get('price') and 'price_value' in structured:
+            fields['price_value'] = structured['price_value']
+            fields['currency'] = structured.get('currency', marketplace['currency'] if marketplace else '')
+        else:
+            fields['price_value'] = parse_price(fields['price'], marketplace)
+            fields['currency'] = marketplace['currency'] if marketplace else ''
+        
+        if fields['ratings'] == structured.get('ratings') and 'rating_value' in structured:
+            fields['rating_value'] = structured['rating_value']
+        else:
+            fields['rating_value'] = parse_rating(fields['ratings'], marketplace)
+        
+        fields['images'] = structured.get('images') or ([fields['image']] if fields['image'] else [])
+        fields['asin'] = structured.get('asin', '')
+        fields['variant_prices'] = structured.get('variant_prices', [])
+        return fields
+    
+    def _scrape_title(self, soup, marketplace=None):
         """Extract product title"""
         # Primary selector from Medium article
-        title_selectors = [
+        title_selectors = get_selectors(marketplace, 'title') + [
             '#title',
             '#productTitle',
             'h1[data-automation-id="product-title"]',
@@ -102,17 +169,18 @@ class AmazonScraper:
         if title_tag:
             title_text = title_tag.get_text(strip=True)
             # Remove Amazon prefixes
-            for prefix in ['Amazon.com: ', 'Amazon.ca: ', 'Amazon.co.uk: ']:
+            prefixes = [marketplace['title_prefix']] if marketplace else [m['title_prefix'] for m in MARKETPLACES.values()]
+            for prefix in prefixes:
                 if title_text.startswith(prefix):
                     return title_text[len(prefix):]
             return title_text
         
         return 'Title not found'
     
-    def _scrape_price(self, soup):
+    def _scrape_price(self, soup, marketplace=None):
         """Extract product price"""
         # Primary selectors from Medium article
-        price_selectors = [
+        price_selectors = get_selectors(marketplace, 'price') + [
             '#priceblock_ourprice',
             '#priceblock_dealprice',
             '.a-price-whole',
@@ -127,23 +195,23 @@ class AmazonScraper:
             if element:
                 price_text = element.get_text(strip=True)
                 # Check if it contains currency symbols
-                if re.search(r'[\$€£¥]\s*\d+[\.,]\d+|\d+[\.,]\d+\s*[\$€£¥]', price_text):
+                if get_price_pattern(marketplace).search(price_text):
                     return price_text
         
         # Try to find price in any element with price-related classes/IDs
         price_containers = soup.find_all(['span', 'div'], class_=re.compile(r'price|cost|amount'))
         for container in price_containers:
             price_text = container.get_text(strip=True)
-            price_match = re.search(r'[\$€£¥]\s*\d+[\.,]\d+|\d+[\.,]\d+\s*[\$€£¥]', price_text)
+            price_match = get_price_pattern(marketplace).search(price_text)
             if price_match:
                 return price_match.group(0)
         
         return 'Price not found'
     
-    def _scrape_image(self, soup):
+    def _scrape_image(self, soup, marketplace=None):
         """Extract product image URL"""
         # Primary selector from Medium article
-        image_selectors = [
+        image_selectors = get_selectors(marketplace, 'image') + [
             '#imgTagWrapperId img',
             '#landingImage',
             '#imgBlkFront',
@@ -163,10 +231,10 @@ class AmazonScraper:
         
         return ''
     
-    def _scrape_ratings(self, soup):
+    def _scrape_ratings(self, soup, marketplace=None):
         """Extract product ratings"""
         # Primary selector from Medium article
-        rating_selectors = [
+        rating_selectors = get_selectors(marketplace, 'ratings') + [
             '#acrPopover',
             '.a-icon-alt',
             '[data-automation-id="product-rating"]',
@@ -179,12 +247,12 @@ class AmazonScraper:
             if element:
                 # Try title attribute first (as suggested in article)
                 title_attr = element.get('title')
-                if title_attr and ('out of' in title_attr or 'stars' in title_attr):
+                if title_attr and is_rating_text(title_attr, marketplace):
                     return title_attr.strip()
                 
                 # Fallback to text content
                 rating_text = element.get_text(strip=True)
-                if 'out of' in rating_text or 'stars' in rating_text:
+                if is_rating_text(rating_text, marketplace):
                     return rating_text
         
         # Try to find review count
@@ -196,15 +264,15 @@ class AmazonScraper:
         
         for selector in review_selectors:
             element = soup.select_one(selector)
-            if element and 'ratings' in element.get_text():
+            if element and is_review_text(element.get_text(), marketplace):
                 return element.get_text(strip=True)
         
         return ''
     
-    def _scrape_description(self, soup):
+    def _scrape_description(self, soup, marketplace=None):
         """Extract product description"""
         # Primary selector from Medium article
-        description_selectors = [
+        description_selectors = get_selectors(marketplace, 'description') + [
             '#productDescription',
             '#feature-bullets ul',
             '.a-unordered-list',
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Comparison index for scraped products
+Keeps sorted rankings, per-domain stats and price-drop alerts up to date
+incrementally as products are added, removed and refreshed
+"""
+
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+
+from marketplaces import (
+    convert_price, get_marketplace, load_exchange_rates, parse_price, parse_rating
+)
+
+
+class ComparisonIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Sorted (key, product_id) lists - kept ordered with bisect on every change
+        self._by_price = []
+        self._by_rating = []
+        self._by_value = []
+        self._domains = {}
+        self._price_drops = {}
+
+    def add(self, product):
+        """Index a newly scraped product"""
+        with self._lock:
+            existing = self._entries.get(product['id'])
+            if existing:
+                self._delete(existing)
+            self._insert(self._make_entry(product))
+
+    def remove(self, product_id):
+        """Drop a product and its alerts from the index"""
+        with self._lock:
+            entry = self._entries.get(product_id)
+            if entry:
+                self._delete(entry)
+            self._price_drops.pop(product_id, None)
+
+    def refresh(self, product):
+        """
+        Re-index a re-scraped product, recording a price drop if there was one
+        A price that recovers to or above its previous level clears the alert
+        Products removed while they were being re-scraped stay out of the index
+        """
+        with self._lock:
+            old_entry = self._entries.get(product['id'])
+            if old_entry is None:
+                return
+            new_entry = self._make_entry(product)
+            self._delete(old_entry)
+            old_price = old_entry['price_value']
+            new_price = new_entry['price_value']
+            has_prices = old_price is not None and new_price is not None
+            if has_prices and new_price >= old_price:
+                self._price_drops.pop(product['id'], None)
+            elif has_prices:
+                self._price_drops[product['id']] = {
+                    'id': product['id'],
+                    'title': product.get('title'),
+                    'url': product.get('url'),
+                    'domain': new_entry['domain'],
+                    # old_price/new_price are in base_currency, the display prices are as scraped
+                    'base_currency': load_exchange_rates()['base'],
+                    'old_price': old_price,
+                    'new_price': new_price,
+                    'old_display_price': old_entry['price'],
+                    'new_display_price': new_entry['price'],
+                    'drop': round(old_price - new_price, 2),
+                    'drop_percent': round((old_price - new_price) / old_price * 100, 1),
+                    'detected_at': datetime.now().isoformat()
+                }
+            self._insert(new_entry)
+
+    def clear(self):
+        """Remove everything from the index"""
+        with self._lock:
+            self._entries.clear()
+            self._by_price.clear()
+            self._by_rating.clear()
+            self._by_value.clear()
+            self._domains.clear()
+            self._price_drops.clear()
+
+    def compare(self, limit=10):
+        """Build the ranked comparison views"""
+        with self._lock:
+            return {
+                'cheapest': self._ranked(self._by_price, limit),
+                'best_rated': self._ranked(self._by_rating, limit),
+                'best_value': self._ranked(self._by_value, limit),
+                'domains': self._domain_stats(),
+                'price_drops': sorted(
+                    self._price_drops.values(),
+                    key=lambda alert: alert['detected_at'],
+                    reverse=True
+                ),
+                'base_currency': load_exchange_rates()['base'],
+                'products_count': len(self._entries)
+            }
+
+    def _make_entry(self, product):
+        """Use the scraper's normalized values, parsing display strings only as a fallback"""
+        marketplace = get_marketplace(product.get('domain', ''))
+        price_value = product.get('price_base')
+        if 'price_base' not in product:
+            price_value = parse_price(product.get('price'), marketplace)
+            if marketplace:
+                price_value = convert_price(price_value, marketplace['currency'])
+        rating_value = product.get('rating_value')
+        if 'rating_value' not in product:
+            rating_value = parse_rating(product.get('ratings'), marketplace)
+        price_per_rating = None
+        if price_value is not None and rating_value:
+            price_per_rating = round(price_value / rating_value, 2)
+
+        return {
+            'id': product['id'],
+            'title': product.get('title'),
+            'price': product.get('price'),
+            'ratings': product.get('ratings'),
+            'domain': product.get('domain', ''),
+            'url': product.get('url'),
+            'image': product.get('image'),
+            'price_value': price_value,
+            'rating_value': rating_value,
+            'price_per_rating': price_per_rating
+        }
+
+    def _insert(self, entry):
+        product_id = entry['id']
+        self._entries[product_id] = entry
+
+        if entry['price_value'] is not None:
+            insort(self._by_price, (entry['price_value'], product_id))
+        if entry['rating_value'] is not None:
+            insort(self._by_rating, (-entry['rating_value'], product_id))
+        if entry['price_per_rating'] is not None:
+            insort(self._by_value, (entry['price_per_rating'], product_id))
+
+        # Totals are kept in hundredths so repeated adds and removes don't drift
+        stats = self._domains.setdefault(entry['domain'], {
+            'count': 0,
+            'prices': [],
+            'price_total': 0,
+            'rated': 0,
+            'rating_total': 0
+        })
+        stats['count'] += 1
+        if entry['price_value'] is not None:
+            insort(stats['prices'], entry['price_value'])
+            stats['price_total'] += _hundredths(entry['price_value'])
+        if entry['rating_value'] is not None:
+            stats['rated'] += 1
+            stats['rating_total'] += _hundredths(entry['rating_value'])
+
+    def _delete(self, entry):
+        product_id = entry['id']
+        del self._entries[product_id]
+
+        if entry['price_value'] is not None:
+            _remove_sorted(self._by_price, (entry['price_value'], product_id))
+        if entry['rating_value'] is not None:
+            _remove_sorted(self._by_rating, (-entry['rating_value'], product_id))
+        if entry['price_per_rating'] is not None:
+            _remove_sorted(self._by_value, (entry['price_per_rating'], product_id))
+
+        stats = self._domains[entry['domain']]
+        stats['count'] -= 1
+        if entry['price_value'] is not None:
+            _remove_sorted(stats['prices'], entry['price_value'])
+            stats['price_total'] -= _hundredths(entry['price_value'])
+        if entry['rating_value'] is not None:
+            stats['rated'] -= 1
+            stats['rating_total'] -= _hundredths(entry['rating_value'])
+        if stats['count'] == 0:
+            del self._domains[entry['domain']]
+
+    def _ranked(self, ranking, limit):
+        return [self._entries[product_id] for _, product_id in ranking[:limit]]
+
+    def _domain_stats(self):
+        domain_stats = {}
+        for domain, stats in self._domains.items():
+            prices = stats['prices']
+            domain_stats[domain] = {
+                'count': stats['count'],
+                'min_price': prices[0] if prices else None,
+                'max_price': prices[-1] if prices else None,
+                'avg_price': round(stats['price_total'] / len(prices) / 100, 2) if prices else None,
+                'avg_rating': round(stats['rating_total'] / stats['rated'] / 100, 2) if stats['rated'] else None
+            }
+        return domain_stats
+
+
+def _hundredths(value):
+    """Prices and ratings as whole hundredths, for exact running totals"""
+    return round(value * 100)
+
+
+def _remove_sorted(items, value):
+    """Remove one occurrence of value from a sorted list"""
+    index = bisect_left(items, value)
+    if index < len(items) and items[index] == value:
+        del items[index]
@@ -4,7 +4,7 @@ Flask Backend Server for Amazon Scraper
 Communicates with the browser extension
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_file, send_from_directory
 from flask_cors import CORS
 import requests
 from bs4 import BeautifulSoup
@@ -14,11 +14,26 @@ import random
 from urllib.parse import urlparse
 import re
 import os
+import threading
+import uuid
 from datetime import datetime
 
+from comparison_index import ComparisonIndex
+from image_cache import ImageCache, guess_mimetype
+from marketplaces import (
+    MARKETPLACES, convert_price, get_marketplace, get_price_pattern, get_selectors,
+    is_rating_text, is_review_text, parse_price, parse_rating
+)
+from structured_data import extract_structured_data
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for browser extension communication
 
+# Scraper settings - overridable so load tests can run against a local mock origin
+SCRAPER_ORIGIN = os.environ.get('SCRAPER_ORIGIN')
+SCRAPER_MIN_DELAY = float(os.environ.get('SCRAPER_MIN_DELAY', 1))
+SCRAPER_MAX_DELAY = float(os.environ.get('SCRAPER_MAX_DELAY', 2))
+
 class AmazonScraper:
     def __init__(self):
         self.session = requests.Session()
@@ -34,8 +49,7 @@ class AmazonScraper:
     
     def is_amazon_url(self, url):
         """Check if URL is from Amazon"""
-        parsed_url = urlparse(url)
-        return 'amazon.com' in parsed_url.netloc or 'amazon.ca' in parsed_url.netloc or 'amazon.co.uk' in parsed_url.netloc
+        return get_marketplace(urlparse(url).netloc) is not None
     
     def scrape_product(self, url):
         """Scrape Amazon product information"""
@@ -49,26 +63,43 @@ class AmazonScraper:
         
         try:
             # Add random delay to be respectful
-            time.sleep(random.uniform(1, 2))
+            time.sleep(random.uniform(SCRAPER_MIN_DELAY, SCRAPER_MAX_DELAY))
             
             # Fetch the page
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(self._fetch_url(url), timeout=10)
             response.raise_for_status()
             
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if self._is_captcha_page(response.content):
+                return {
+                    'success': False,
+                    'error': 'Blocked by CAPTCHA',
+                    'message': 'Amazon returned a CAPTCHA page instead of the product',
+                    'url': url
+                }
+            
+            # Read embedded structured data first, falling back to the DOM
+            marketplace = get_marketplace(urlparse(url).netloc)
+            fields = self._extract_fields(response.content, marketplace)
             
             # Extract product data
             product_data = {
                 'success': True,
                 'url': url,
                 'domain': urlparse(url).netloc,
+                'country': marketplace['country'],
                 'scraped_at': datetime.now().isoformat(),
-                'title': self._scrape_title(soup),
-                'price': self._scrape_price(soup),
-                'image': self._scrape_image(soup),
-                'ratings': self._scrape_ratings(soup),
-                'description': self._scrape_description(soup)
+                'title': fields['title'],
+                'price': fields['price'],
+                'currency': fields['currency'],
+                'price_value': fields['price_value'],
+                'price_base': convert_price(fields['price_value'], fields['currency']),
+                'image': fields['image'],
+                'images': fields['images'],
+                'ratings': fields['ratings'],
+                'rating_value': fields['rating_value'],
+                'description': fields['description'],
+                'asin': fields['asin'],
+                'variant_prices': fields['variant_prices']
             }
             
             return product_data
@@ -88,9 +119,62 @@ class AmazonScraper:
                 'url': url
             }
     
-    def _scrape_title(self, soup):
+    def _fetch_url(self, url):
+        """Point the request at SCRAPER_ORIGIN instead of Amazon, if set"""
+        if not SCRAPER_ORIGIN:
+            return url
+        parsed_url = urlparse(url)
+        return SCRAPER_ORIGIN.rstrip('/') + parsed_url.path + (f"?{parsed_url.query}" if parsed_url.query else '')
+    
+    def _is_captcha_page(self, content):
+        """Check for Amazon's robot check page"""
+        return b'/errors/validateCaptcha' in content
+    
+    def _extract_fields(self, content, marketplace=None):
+        """
+        Extract product fields from embedded JSON-LD/a-state data,
+        only building a BeautifulSoup tree for fields it doesn't cover
+        """
+        structured = extract_structured_data(content)
+        soup = None
+        
+        fields = {}
+        dom_scrapers = {
+            'title': self._scrape_title,
+            'price': self._scrape_price,
+            'image': self._scrape_image,
+            'ratings': self._scrape_ratings,
+            'description': self._scrape_description
+        }
+        for field, scrape in dom_scrapers.items():
+            value = structured.get(field)
+            if not value:
+                if soup is None:
+                    soup = BeautifulSoup(content, 'html.parser')
+                value = scrape(soup, marketplace)
+            fields[field] = value
+        
+        # Prefer the numeric price from structured data over re-parsing the display string
+        if fields['price'] == structured.get('price') and 'price_value' in structured:
+            fields['price_value'] = structured['price_value']
+            fields['currency'] = structured.get('currency', marketplace['currency'] if marketplace else '')
+        else:
+            fields['price_value'] = parse_price(fields['price'], marketplace)
+            fields['currency'] = marketplace['currency'] if marketplace else ''
+        
+        if fields['ratings'] == structured.get('ratings') and 'rating_value' in structured:
+            fields['rating_value'] = structured['rating_value']
+        else:
+            fields['rating_value'] = parse_rating(fields['ratings'], marketplace)
+        
+        fields['images'] = structured.get('images') or ([fields['image']] if fields['image'] else [])
+        fields['asin'] = structured.get('asin', '')
+        fields['variant_prices'] = structured.get('variant_prices', [])
+        return fields
+    
+    def _scrape_title(self, soup, marketplace=None):
         """Extract product title"""
-        title_selectors = [
+        title_selectors = get_selectors(marketplace, 'title') + [
             '#title',
             '#productTitle',
             'h1[data-automation-id="product-title"]',
@@ -108,16 +192,17 @@ class AmazonScraper:
         title_tag = soup.find('title')
         if title_tag:
             title_text = title_tag.get_text(strip=True)
-            for prefix in ['Amazon.com: ', 'Amazon.ca: ', 'Amazon.co.uk: ']:
+            prefixes = [marketplace['title_prefix']] if marketplace else [m['title_prefix'] for m in MARKETPLACES.values()]
+            for prefix in prefixes:
                 if title_text.startswith(prefix):
                     return title_text[len(prefix):]
             return title_text
         
         return 'Title not found'
     
-    def _scrape_price(self, soup):
+    def _scrape_price(self, soup, marketplace=None):
         """Extract product price"""
-        price_selectors = [
+        price_selectors = get_selectors(marketplace, 'price') + [
             '#priceblock_ourprice',
             '#priceblock_dealprice',
             '.a-price-whole',
@@ -131,22 +216,22 @@ class AmazonScraper:
             element = soup.select_one(selector)
             if element:
                 price_text = element.get_text(strip=True)
-                if re.search(r'[\$€£¥]\s*\d+[\.,]\d+|\d+[\.,]\d+\s*[\$€£¥]', price_text):
+                if get_price_pattern(marketplace).search(price_text):
                     return price_text
         
         # Try to find price in any element with price-related classes/IDs
         price_containers = soup.find_all(['span', 'div'], class_=re.compile(r'price|cost|amount'))
         for container in price_containers:
             price_text = container.get_text(strip=True)
-            price_match = re.search(r'[\$€£¥]\s*\d+[\.,]\d+|\d+[\.,]\d+\s*[\$€£¥]', price_text)
+            price_match = get_price_pattern(marketplace).search(price_text)
             if price_match:
                 return price_match.group(0)
         
         return 'Price not found'
     
-    def _scrape_image(self, soup):
+    def _scrape_image(self, soup, marketplace=None):
         """Extract product image URL"""
-        image_selectors = [
+        image_selectors = get_selectors(marketplace, 'image') + [
             '#imgTagWrapperId img',
             '#landingImage',
             '#imgBlkFront',
@@ -165,9 +250,9 @@ class AmazonScraper:
         
         return ''
     
-    def _scrape_ratings(self, soup):
+    def _scrape_ratings(self, soup, marketplace=None):
         """Extract product ratings"""
-        rating_selectors = [
+        rating_selectors = get_selectors(marketplace, 'ratings') + [
             '#acrPopover',
             '.a-icon-alt',
             '[data-automation-id="product-rating"]',
@@ -180,12 +265,12 @@ class AmazonScraper:
             if element:
                 # Try title attribute first
                 title_attr = element.get('title')
-                if title_attr and ('out of' in title_attr or 'stars' in title_attr):
+                if title_attr and is_rating_text(title_attr, marketplace):
                     return title_attr.strip()
                 
                 # Fallback to text content
                 rating_text = element.get_text(strip=True)
-                if 'out of' in rating_text or 'stars' in rating_text:
+                if is_rating_text(rating_text, marketplace):
                     return rating_text
         
         # Try to find review count
@@ -197,14 +282,14 @@ class AmazonScraper:
         
         for selector in review_selectors:
             element = soup.select_one(selector)
-            if element and 'ratings' in element.get_text():
+            if element and is_review_text(element.get_text(), marketplace):
                 return element.get_text(strip=True)
         
         return ''
     
-    def _scrape_description(self, soup):
+    def _scrape_description(self, soup, marketplace=None):
         """Extract product description"""
-        description_selectors = [
+        description_selectors = get_selectors(marketplace, 'description') + [
             '#productDescription',
             '#feature-bullets ul',
             '.a-unordered-list',
@@ -226,6 +311,45 @@ scraper = AmazonScraper()
 
 # In-memory storage for products (in production, use a database)
 products_storage = []
+# Guards changes to products_storage and keeps comparison_index in step with it
+storage_lock = threading.Lock()
+
+# Rankings and aggregates over products_storage, maintained incrementally
+comparison_index = ComparisonIndex()
+
+# Optional image stage - set IMAGE_CACHE_DIR to serve product images locally
+IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR')
+image_cache = ImageCache(IMAGE_CACHE_DIR, session=scraper.session) if IMAGE_CACHE_DIR else None
+
+def cache_product_image(product):
+    """
+    Cache a stored product's main image in the background, if the image cache is enabled
+    image_hash/image_local are added to the stored product once the download finishes
+    """
+    if image_cache is None or not product.get('image'):
+        return
+    product_id = product['id']
+    image_url = product['image']
+    
+    def on_stored(image_hash):
+        # Runs on an image-cache thread, so swap in a new dict rather than
+        # mutating one a request thread may be serializing
+        with storage_lock:
+            for index, stored in enumerate(products_storage):
+                # The product may have been deleted or refreshed with a different image meanwhile
+                if stored.get('id') == product_id and stored.get('image') == image_url:
+                    products_storage[index] = {
+                        **stored,
+                        'image_hash': image_hash,
+                        'image_local': f"/api/images/{image_hash}"
+                    }
+                    break
+    
+    image_cache.store_async(image_url, on_stored)
+
+def get_stored_product(product_id):
+    """Look up a stored product by id"""
+    return next((p for p in products_storage if p.get('id') == product_id), None)
 
 @app.route('/')
 def index():
@@ -236,6 +360,9 @@ def index():
         'endpoints': {
             'scrape': '/api/scrape',
             'products': '/api/products',
+            'refresh': '/api/products/<id>/refresh',
+            'compare': '/api/compare',
+            'images': '/api/images/<hash>',
             'clear': '/api/clear'
         }
     })
@@ -258,8 +385,13 @@ def scrape_product():
         
         # If successful, add to storage
         if result['success']:
-            result['id'] = str(int(time.time() * 1000))  # Generate unique ID
-            products_storage.append(result)
+            result['id'] = uuid.uuid4().hex  # Unique even for concurrent scrapes
+            with storage_lock:
+                products_storage.append(result)
+                comparison_index.add(result)
+            cache_product_image(result)
+            # Already cached images are filled in on the stored product straight away
+            result = get_stored_product(result['id']) or result
             print(f"Successfully scraped: {result['title']}")
         else:
             print(f"Failed to scrape: {result['error']}")
@@ -285,17 +417,92 @@ def get_products():
 def delete_product(product_id):
     """Delete a specific product"""
     global products_storage
-    products_storage = [p for p in products_storage if p.get('id') != product_id]
+    with storage_lock:
+        products_storage = [p for p in products_storage if p.get('id') != product_id]
+        comparison_index.remove(product_id)
     return jsonify({
         'success': True,
         'message': 'Product deleted'
     })
 
+@app.route('/api/products/<product_id>/refresh', methods=['POST'])
+def refresh_product(product_id):
+    """Re-scrape a stored product and replace it with the new result"""
+    product = get_stored_product(product_id)
+    if product is None:
+        return jsonify({
+            'success': False,
+            'error': 'Product not found'
+        })
+    
+    try:
+        result = scraper.scrape_product(product['url'])
+        if not result['success']:
+            print(f"Failed to refresh: {result['error']}")
+            return jsonify(result)
+        
+        result['id'] = product_id
+        with storage_lock:
+            # The product may have been deleted or cleared while it was being re-scraped
+            index = next((i for i, p in enumerate(products_storage) if p.get('id') == product_id), None)
+            if index is None:
+                return jsonify({
+                    'success': False,
+                    'error': 'Product not found'
+                })
+            # Swap in a new dict rather than mutating one /api/products may be serializing
+            products_storage[index] = result
+            comparison_index.refresh(result)
+        cache_product_image(result)
+        result = get_stored_product(product_id) or result
+        print(f"Successfully refreshed: {result['title']}")
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': 'Server error',
+            'message': str(e)
+        })
+
+@app.route('/api/compare', methods=['GET'])
+def compare_products():
+    """Get ranked comparison views, per-domain stats and price-drop alerts"""
+    # A negative limit would slice from the end of the rankings
+    limit = max(0, request.args.get('limit', 10, type=int))
+    return jsonify({
+        'success': True,
+        **comparison_index.compare(limit)
+    })
+
+@app.route('/api/images/<image_hash>', methods=['GET'])
+def get_image(image_hash):
+    """Serve a cached product image, optionally as a thumbnail (?size=thumb|medium)"""
+    size = request.args.get('size')
+    path = image_cache.get_path(image_hash, size) if image_cache else None
+    if path is None:
+        return jsonify({
+            'success': False,
+            'error': 'Image not found'
+        }), 404
+    
+    response = send_file(path, mimetype=guess_mimetype(path))
+    if size and image_cache.thumbnails_enabled and path == image_cache.get_path(image_hash):
+        # Thumbnail is still being built - don't let browsers keep the original forever
+        response.headers['Cache-Control'] = 'no-cache'
+    else:
+        # Content-addressed, so the bytes behind a URL never change
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @app.route('/api/clear', methods=['POST'])
 def clear_products():
     """Clear all products"""
     global products_storage
-    products_storage = []
+    with storage_lock:
+        products_storage = []
+        comparison_index.clear()
     return jsonify({
         'success': True,
         'message': 'All products cleared'
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Content-addressed image cache for product images
+Downloads each image once in a background thread pool, stores it by SHA-256
+hash and builds resized thumbnails
+"""
+
+import hashlib
+import io
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional - without it the original image is served
+    Image = None
+
+THUMBNAIL_SIZES = {
+    'thumb': 200,
+    'medium': 500
+}
+
+HASH_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+
+class ImageCache:
+    def __init__(self, cache_dir, session=None, workers=4):
+        # Absolute, so send_file doesn't resolve it against the app root instead of the cwd
+        self.cache_dir = os.path.abspath(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.session = session or requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-cache')
+        self._lock = threading.Lock()
+        self._url_hashes = {}
+        self._downloads = {}
+
+    def store(self, url):
+        """
+        Download an image once and store it by content hash
+        Returns the hash, or None if the image couldn't be fetched
+        """
+        with self._lock:
+            if url in self._url_hashes:
+                return self._url_hashes[url]
+            # Share in-flight downloads of the same URL between requests
+            download = self._downloads.get(url)
+            is_owner = download is None
+            if is_owner:
+                download = self._downloads[url] = {'done': threading.Event(), 'hash': None}
+
+        if not is_owner:
+            download['done'].wait()
+            return download['hash']
+
+        try:
+            download['hash'] = self._download(url)
+        finally:
+            with self._lock:
+                if download['hash']:
+                    self._url_hashes[url] = download['hash']
+                del self._downloads[url]
+            download['done'].set()
+
+        return download['hash']
+
+    def store_async(self, url, callback):
+        """
+        Store an image in the background and call callback(image_hash) once it is cached
+        Already cached URLs call back immediately
+        """
+        with self._lock:
+            image_hash = self._url_hashes.get(url)
+        if image_hash:
+            callback(image_hash)
+            return
+
+        def download_and_notify():
+            image_hash = self.store(url)
+            if image_hash:
+                callback(image_hash)
+
+        self._executor.submit(download_and_notify)
+
+    @property
+    def thumbnails_enabled(self):
+        return Image is not None
+
+    def get_path(self, image_hash, size=None):
+        """
+        Path to a cached image, or None if it isn't cached
+        Falls back to the original while a thumbnail is still being built
+        """
+        if not HASH_PATTERN.fullmatch(image_hash):
+            return None
+        if size in THUMBNAIL_SIZES:
+            thumbnail_path = self._thumbnail_path(image_hash, size)
+            if os.path.exists(thumbnail_path):
+                return thumbnail_path
+        original_path = self._original_path(image_hash)
+        return original_path if os.path.exists(original_path) else None
+
+    def _download(self, url):
+        try:
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Failed to cache image {url}: {e}")
+            return None
+
+        content = response.content
+        # Error pages would otherwise be cached and served as immutable images
+        if sniff_mimetype(content) is None:
+            print(f"Not caching {url}: response is not an image")
+            return None
+
+        image_hash = hashlib.sha256(content).hexdigest()
+        original_path = self._original_path(image_hash)
+
+        # Identical images (e.g. shared across variants) are only written once
+        if not os.path.exists(original_path):
+            self._write(original_path, content)
+        if Image is not None and not os.path.exists(self._thumbnail_path(image_hash, 'medium')):
+            self._executor.submit(self._make_thumbnails, image_hash, content)
+
+        return image_hash
+
+    def _make_thumbnails(self, image_hash, content):
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                image = image.convert('RGB')
+                for size, max_dimension in THUMBNAIL_SIZES.items():
+                    thumbnail = image.copy()
+                    thumbnail.thumbnail((max_dimension, max_dimension))
+                    output = io.BytesIO()
+                    thumbnail.save(output, format='JPEG', quality=85)
+                    self._write(self._thumbnail_path(image_hash, size), output.getvalue())
+        except Exception as e:
+            print(f"Failed to build thumbnails for {image_hash}: {e}")
+
+    def _write(self, path, content):
+        # Write to a temp file first so readers never see a partial image
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    def _original_path(self, image_hash):
+        return os.path.join(self.cache_dir, image_hash)
+
+    def _thumbnail_path(self, image_hash, size):
+        return os.path.join(self.cache_dir, f"{image_hash}_{size}.jpg")
+
+
+def sniff_mimetype(content):
+    """Detect an image's type from its first bytes, or None if it isn't an image"""
+    for signature, mimetype in IMAGE_SIGNATURES:
+        if content.startswith(signature):
+            return mimetype
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def guess_mimetype(path):
+    """Detect a cached image's type from the file's first bytes"""
+    with open(path, 'rb') as f:
+        header = f.read(12)
+    return sniff_mimetype(header) or 'application/octet-stream'
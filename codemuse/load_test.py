@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Load and soak testing for the Flask API
+Runs a local mock Amazon origin, starts flask_server.py against it and drives
+the API with concurrent requests, reporting throughput, latency percentiles,
+error rates and server memory (RSS) over time
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+CAPTCHA_PAGE = b"""<html><head><title>Amazon.com</title></head><body>
+<form method="get" action="/errors/validateCaptcha">
+<h4>Enter the characters you see below</h4>
+<input type="text" id="captchacharacters" name="field-keywords">
+</form></body></html>"""
+
+
+class MockAmazonHandler(BaseHTTPRequestHandler):
+    """Serves generated product pages with configurable latency and failures"""
+
+    # Set by start_mock_server
+    config = None
+
+    def do_GET(self):
+        config = self.config
+        delay = config['latency_ms'] + random.uniform(0, config['latency_jitter_ms'])
+        time.sleep(delay / 1000)
+
+        roll = random.random()
+        if roll < config['error_rate']:
+            self._respond(503, b'Service Unavailable')
+        elif roll < config['error_rate'] + config['captcha_rate']:
+            self._respond(200, CAPTCHA_PAGE)
+        else:
+            self._respond(200, product_page(self.path.rstrip('/').split('/')[-1], config['page_kb']))
+
+    def _respond(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def product_page(asin, page_kb):
+    """Build a product page with JSON-LD data, padded to roughly page_kb"""
+    price = round(random.uniform(5, 500), 2)
+    product = {
+        '@context': 'https://schema.org',
+        '@type': 'Product',
+        'name': f'Load Test Product {asin}',
+        'sku': asin,
+        'image': [f'https://m.media-amazon.com/images/I/{asin}.jpg'],
+        'description': 'Generated product used for load testing the scraper API. ' * 4,
+        'aggregateRating': {'ratingValue': round(random.uniform(1, 5), 1), 'reviewCount': 100},
+        'offers': {'price': price, 'priceCurrency': 'USD'}
+    }
+    head = (
+        f'<html><head><title>Amazon.com: {product["name"]}</title>'
+        f'<script type="application/ld+json">{json.dumps(product)}</script></head><body>'
+        f'<span id="productTitle">{product["name"]}</span>'
+        f'<span class="a-price"><span class="a-offscreen">${price}</span></span>'
+    ).encode('utf-8')
+    padding_line = b'<div class="a-section">' + b'x' * 100 + b'</div>\n'
+    padding_lines = max(0, (page_kb * 1024 - len(head)) // len(padding_line))
+    return head + padding_line * padding_lines + b'</body></html>'
+
+
+def start_mock_server(port, config):
+    """Start the mock Amazon origin in a background thread"""
+    MockAmazonHandler.config = config
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockAmazonHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_api_server(port, origin, log_path):
+    """Start flask_server.py pointed at the mock origin"""
+    env = dict(os.environ)
+    env.update({
+        'SCRAPER_ORIGIN': origin,
+        'SCRAPER_MIN_DELAY': '0',
+        'SCRAPER_MAX_DELAY': '0',
+        'PYTHONUNBUFFERED': '1'
+    })
+    log_file = open(log_path, 'w') if log_path else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [
+            sys.executable, '-c',
+            f"import flask_server; flask_server.app.run(host='127.0.0.1', port={port}, threaded=True)"
+        ],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT
+    )
+
+    # Wait for the server to come up
+    api_url = f'http://127.0.0.1:{port}'
+    for _ in range(50):
+        if process.poll() is not None:
+            raise RuntimeError('Flask server exited during startup')
+        try:
+            if requests.get(f'{api_url}/api/health', timeout=1).status_code == 200:
+                return process, api_url
+        except requests.RequestException:
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError('Flask server did not start in time')
+
+
+def read_rss_kb(pid):
+    """Resident set size of a process in KB, read from /proc"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class LoadTest:
+    def __init__(self, api_url, args, server_pid=None):
+        self.api_url = api_url
+        self.args = args
+        self.server_pid = server_pid
+        self.results = []
+        self.samples = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counter = 0
+        self._stop = threading.Event()
+
+    def run(self):
+        """Drive the API until the request count or duration is reached"""
+        self.started_at = time.time()
+        # Baseline sample before any load, so growth is measured from idle
+        self._record_sample()
+        sampler = threading.Thread(target=self._sample_memory, daemon=True)
+        sampler.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+                workers = [executor.submit(self._worker) for _ in range(self.args.concurrency)]
+                # Re-raise anything that killed a worker instead of quietly shrinking the run
+                try:
+                    for worker in workers:
+                        worker.result()
+                except Exception:
+                    self._stop.set()
+                    raise
+        finally:
+            self.finished_at = time.time()
+            self._stop.set()
+            sampler.join()
+        self._record_sample()
+
+    def _worker(self):
+        deadline = self.started_at + self.args.duration if self.args.duration else None
+        while not self._stop.is_set():
+            if deadline and time.time() >= deadline:
+                break
+            request_number = self._next_request()
+            if request_number is None:
+                break
+            endpoint = 'scrape' if random.random() < self.args.scrape_ratio else 'products'
+            self._send(endpoint, request_number)
+
+    def _next_request(self):
+        with self._lock:
+            if self.args.requests and self._counter >= self.args.requests:
+                return None
+            self._counter += 1
+            return self._counter
+
+    def _send(self, endpoint, request_number):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+
+        error = None
+        start = time.perf_counter()
+        try:
+            if endpoint == 'scrape':
+                asin = f'B{request_number % self.args.unique_products:09d}'
+                response = session.post(
+                    f'{self.api_url}/api/scrape',
+                    json={'url': f'https://www.amazon.com/dp/{asin}'},
+                    timeout=self.args.timeout
+                )
+            else:
+                response = session.get(f'{self.api_url}/api/products', timeout=self.args.timeout)
+
+            if response.status_code != 200:
+                error = f'HTTP {response.status_code}'
+            else:
+                data = response.json()
+                if not isinstance(data, dict):
+                    error = 'Unexpected response body'
+                elif not data.get('success'):
+                    error = data.get('error', 'Unknown error')
+        except (requests.RequestException, ValueError) as e:
+            error = type(e).__name__
+        latency = time.perf_counter() - start
+
+        with self._lock:
+            self.results.append((endpoint, latency, error))
+
+    def _sample_memory(self):
+        while not self._stop.wait(self.args.sample_interval):
+            self._record_sample()
+
+    def _record_sample(self):
+        with self._lock:
+            completed = len(self.results)
+        self.samples.append({
+            'elapsed': round(time.time() - self.started_at, 2),
+            'rss_kb': read_rss_kb(self.server_pid) if self.server_pid else None,
+            'completed_requests': completed
+        })
+
+    def report(self):
+        """Summarize the run per endpoint and overall"""
+        elapsed = self.finished_at - self.started_at
+        endpoints = {}
+        for name in sorted({endpoint for endpoint, _, _ in self.results}):
+            endpoints[name] = summarize([r for r in self.results if r[0] == name], elapsed)
+
+        rss_values = [s['rss_kb'] for s in self.samples if s['rss_kb'] is not None]
+        return {
+            'duration_s': round(elapsed, 2),
+            'concurrency': self.args.concurrency,
+            'overall': summarize(self.results, elapsed),
+            'endpoints': endpoints,
+            'memory': {
+                'start_rss_kb': rss_values[0] if rss_values else None,
+                'peak_rss_kb': max(rss_values) if rss_values else None,
+                'end_rss_kb': rss_values[-1] if rss_values else None,
+                'samples': self.samples
+            }
+        }
+
+
+def summarize(results, elapsed):
+    """Throughput, latency percentiles and error breakdown for a set of results"""
+    latencies = sorted(latency for _, latency, _ in results)
+    errors = {}
+    for _, _, error in results:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+
+    return {
+        'requests': len(results),
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else 0,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'error_rate': round(sum(errors.values()) / len(results), 4) if results else 0,
+        'errors': errors
+    }
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile in milliseconds"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(percent / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[rank] * 1000, 2)
+
+
+def print_report(report):
+    print("\n" + "=" * 60)
+    print(f"Load test finished in {report['duration_s']}s at concurrency {report['concurrency']}")
+    print("=" * 60)
+
+    print(f"\n{'endpoint':<10} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    rows = list(report['endpoints'].items()) + [('overall', report['overall'])]
+    for name, stats in rows:
+        print(
+            f"{name:<10} {stats['requests']:>9} {stats['throughput_rps']:>9} "
+            f"{stats['p50_ms']!s:>9} {stats['p95_ms']!s:>9} {stats['p99_ms']!s:>9} "
+            f"{stats['error_rate']:>8.2%}"
+        )
+
+    if report['overall']['errors']:
+        print("\nErrors:")
+        for error, count in sorted(report['overall']['errors'].items(), key=lambda item: -item[1]):
+            print(f"  {error}: {count}")
+
+    memory = report['memory']
+    if memory['peak_rss_kb'] is not None:
+        print("\nServer memory (RSS):")
+        print(f"  start {memory['start_rss_kb'] / 1024:.1f} MB, "
+              f"peak {memory['peak_rss_kb'] / 1024:.1f} MB, "
+              f"end {memory['end_rss_kb'] / 1024:.1f} MB")
+        for sample in memory['samples']:
+            if sample['rss_kb'] is not None:
+                print(f"  {sample['elapsed']:>8.1f}s  {sample['rss_kb'] / 1024:>8.1f} MB  "
+                      f"{sample['completed_requests']:>8} requests")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Load and soak test the Amazon scraper API')
+    parser.add_argument('--concurrency', type=int, default=10, help='Concurrent clients')
+    parser.add_argument('--requests', type=int, help='Total requests (default 500 unless --duration is set)')
+    parser.add_argument('--duration', type=float, default=0, help='Run for this many seconds (soak mode)')
+    parser.add_argument('--scrape-ratio', type=float, default=0.5, help='Share of requests hitting /api/scrape')
+    parser.add_argument('--unique-products', type=int, default=1000, help='Distinct ASINs to cycle through')
+    parser.add_argument('--timeout', type=float, default=30, help='Client request timeout in seconds')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Mock origin base latency')
+    parser.add_argument('--latency-jitter-ms', type=float, default=50, help='Extra random mock latency')
+    parser.add_argument('--page-kb', type=int, default=200, help='Approximate mock page size')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of mock responses that are 503s')
+    parser.add_argument('--captcha-rate', type=float, default=0.0, help='Share of mock responses that are CAPTCHAs')
+    parser.add_argument('--mock-port', type=int, default=5100, help='Port for the mock Amazon origin')
+    parser.add_argument('--api-port', type=int, default=5101, help='Port for the Flask server under test')
+    parser.add_argument('--api-url', help='Test an already running server instead of starting one')
+    parser.add_argument('--sample-interval', type=float, default=1.0, help='Seconds between RSS samples')
+    parser.add_argument('--server-log', help='Write Flask server output to this file')
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this file')
+    args = parser.parse_args()
+
+    if args.requests is None and not args.duration:
+        args.requests = 500
+    return args
+
+
+def main():
+    args = parse_args()
+
+    print("Amazon Scraper API Load Test")
+    print("=" * 60)
+
+    mock_server = None
+    api_process = None
+    api_url = args.api_url
+    if not api_url:
+        mock_server = start_mock_server(args.mock_port, {
+            'latency_ms': args.latency_ms,
+            'latency_jitter_ms': args.latency_jitter_ms,
+            'page_kb': args.page_kb,
+            'error_rate': args.error_rate,
+            'captcha_rate': args.captcha_rate
+        })
+        origin = f'http://127.0.0.1:{args.mock_port}'
+        print(f"Mock Amazon origin: {origin}")
+        api_process, api_url = start_api_server(args.api_port, origin, args.server_log)
+        print(f"Flask server under test: {api_url} (PID: {api_process.pid})")
+
+    try:
+        limit = f"{args.duration}s" if args.duration else f"{args.requests} requests"
+        print(f"Running {limit} at concurrency {args.concurrency}...")
+        load_test = LoadTest(api_url, args, server_pid=api_process.pid if api_process else None)
+        load_test.run()
+        report = load_test.report()
+    finally:
+        if api_process:
+            api_process.terminate()
+            api_process.wait()
+        if mock_server:
+            mock_server.shutdown()
+
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
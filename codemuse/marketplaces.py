@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Amazon marketplace registry
+Per-marketplace currency, number format and selector overrides, plus
+locale-aware price parsing and conversion to a base currency
+"""
+
+import json
+import os
+import re
+
+EXCHANGE_RATES_FILE = os.environ.get(
+    'EXCHANGE_RATES_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exchange_rates.json')
+)
+
+# Matches a currency symbol/code next to a number, in either order
+CURRENCY_TOKEN = r'(?:R\$|CDN\$|A\$|MX\$|[\$€£¥￥₹]|EUR|USD|GBP|JPY|INR)'
+NUMBER_TOKEN = r'\d{1,3}(?:[.,\s]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?'
+# Indian lakh/crore grouping, e.g. 1,29,999.00
+LAKH_NUMBER_TOKEN = r'\d{1,2}(?:,\d{2})*,\d{3}(?:\.\d{1,2})?|' + NUMBER_TOKEN
+
+
+def _price_pattern(number_token):
+    return re.compile(
+        rf'{CURRENCY_TOKEN}\s*(?:{number_token})|(?:{number_token})\s*{CURRENCY_TOKEN}'
+    )
+
+
+PRICE_PATTERN = _price_pattern(NUMBER_TOKEN)
+NUMBER_PATTERN = re.compile(NUMBER_TOKEN)
+LAKH_PRICE_PATTERN = _price_pattern(LAKH_NUMBER_TOKEN)
+LAKH_NUMBER_PATTERN = re.compile(LAKH_NUMBER_TOKEN)
+RATING_NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)?')
+
+# Host prefixes that point at the same marketplace
+HOST_PREFIXES = ('www.', 'smile.', 'm.')
+
+# Every marketplace rates products out of 5 stars
+RATING_SCALE = 5
+
+ENGLISH_RATINGS = ('out of', 'stars')
+ENGLISH_REVIEWS = ('ratings',)
+
+MARKETPLACES = {
+    'amazon.com': {
+        'country': 'US',
+        'currency': 'USD',
+        'decimal': '.',
+        'title_prefix': 'Amazon.com: ',
+        'rating_markers': ENGLISH_RATINGS,
+        'review_markers': ENGLISH_REVIEWS,
+        'selectors': {}
+    },
+    'amazon.ca': {
+        'country': 'CA',
+        'currency': 'CAD',
+        'decimal': '.',
+        'title_prefix': 'Amazon.ca: ',
+        'rating_markers': ENGLISH_RATINGS,
+        'review_markers': ENGLISH_REVIEWS,
+        'selectors': {}
+    },
+    'amazon.co.uk': {
+        'country': 'GB',
+        'currency': 'GBP',
+        'decimal': '.',
+        'title_prefix': 'Amazon.co.uk: ',
+        'rating_markers': ENGLISH_RATINGS,
+        'review_markers': ENGLISH_REVIEWS,
+        'selectors': {}
+    },
+    'amazon.com.au': {
+        'country': 'AU',
+        'currency': 'AUD',
+        'decimal': '.',
+        'title_prefix': 'Amazon.com.au: ',
+        'rating_markers': ENGLISH_RATINGS,
+        'review_markers': ENGLISH_REVIEWS,
+        'selectors': {}
+    },
+    'amazon.in': {
+        'country': 'IN',
+        'currency': 'INR',
+        'decimal': '.',
+        'lakh_grouping': True,
+        'title_prefix': 'Amazon.in: ',
+        'rating_markers': ENGLISH_RATINGS,
+        'review_markers': ENGLISH_REVIEWS,
+        'selectors': {
+            'price': ['#corePriceDisplay_desktop_feature_div .a-offscreen']
+        }
+    },
+    'amazon.de': {
+        'country': 'DE',
+        'currency': 'EUR',
+        'decimal': ',',
+        'title_prefix': 'Amazon.de: ',
+        'rating_markers': ('von 5 Sternen', 'Sterne'),
+        'review_markers': ('Bewertungen', 'Sternebewertungen'),
+        'selectors': {
+            'price': ['#corePriceDisplay_desktop_feature_div .a-offscreen']
+        }
+    },
+    'amazon.fr': {
+        'country': 'FR',
+        'currency': 'EUR',
+        'decimal': ',',
+        'title_prefix': 'Amazon.fr : ',
+        'rating_markers': ('sur 5 étoiles', 'étoiles'),
+        'review_markers': ('évaluations',),
+        'selectors': {
+            'price': ['#corePriceDisplay_desktop_feature_div .a-offscreen']
+        }
+    },
+    'amazon.it': {
+        'country': 'IT',
+        'currency': 'EUR',
+        'decimal': ',',
+        'title_prefix': 'Amazon.it: ',
+        'rating_markers': ('su 5 stelle', 'stelle'),
+        'review_markers': ('voti',),
+        'selectors': {
+            'price': ['#corePriceDisplay_desktop_feature_div .a-offscreen']
+        }
+    },
+    'amazon.es': {
+        'country': 'ES',
+        'currency': 'EUR',
+        'decimal': ',',
+        'title_prefix': 'Amazon.es: ',
+        'rating_markers': ('de 5 estrellas', 'estrellas'),
+        'review_markers': ('valoraciones',),
+        'selectors': {
+            'price': ['#corePriceDisplay_desktop_feature_div .a-offscreen']
+        }
+    },
+    'amazon.nl': {
+        'country': 'NL',
+        'currency': 'EUR',
+        'decimal': ',',
+        'title_prefix': 'Amazon.nl: ',
+        'rating_markers': ('van de 5 sterren', 'sterren'),
+        'review_markers': ('beoordelingen',),
+        'selectors': {
+            'price': ['#corePriceDisplay_desktop_feature_div .a-offscreen']
+        }
+    },
+    'amazon.co.jp': {
+        'country': 'JP',
+        'currency': 'JPY',
+        'decimal': '.',
+        'title_prefix': 'Amazon.co.jp: ',
+        'rating_markers': ('5つ星のうち',),
+        'review_markers': ('個の評価',),
+        # JP ratings read "5つ星のうち4.5", so the score is the last number
+        'rating_last': True,
+        'selectors': {
+            'price': ['#corePrice_feature_div .a-offscreen']
+        }
+    },
+    'amazon.com.mx': {
+        'country': 'MX',
+        'currency': 'MXN',
+        'decimal': '.',
+        'title_prefix': 'Amazon.com.mx: ',
+        'rating_markers': ('de 5 estrellas', 'estrellas'),
+        'review_markers': ('calificaciones',),
+        'selectors': {}
+    },
+    'amazon.com.br': {
+        'country': 'BR',
+        'currency': 'BRL',
+        'decimal': ',',
+        'title_prefix': 'Amazon.com.br: ',
+        'rating_markers': ('de 5 estrelas', 'estrelas'),
+        'review_markers': ('avaliações',),
+        'selectors': {}
+    },
+}
+
+_exchange_rates = None
+
+
+def get_marketplace(host):
+    """Look up the marketplace for a hostname, or None if it isn't Amazon"""
+    host = host.lower().split(':', 1)[0]
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    return MARKETPLACES.get(host)
+
+
+def get_selectors(marketplace, field):
+    """Marketplace-specific selectors to try before the defaults"""
+    if not marketplace:
+        return []
+    return marketplace['selectors'].get(field, [])
+
+
+def get_price_pattern(marketplace):
+    """Regex matching a display price in this marketplace's number format"""
+    if marketplace and marketplace.get('lakh_grouping'):
+        return LAKH_PRICE_PATTERN
+    return PRICE_PATTERN
+
+
+def is_rating_text(text, marketplace):
+    """Check whether text looks like a star rating for this marketplace"""
+    markers = marketplace['rating_markers'] if marketplace else ENGLISH_RATINGS
+    return any(marker in text for marker in markers)
+
+
+def is_review_text(text, marketplace):
+    """Check whether text looks like a review count for this marketplace"""
+    markers = marketplace['review_markers'] if marketplace else ENGLISH_REVIEWS
+    return any(marker in text for marker in markers)
+
+
+def parse_price(price_text, marketplace=None):
+    """
+    Parse a display price into a float using the marketplace's number format
+    Handles '$1,299.99', '1.299,00 €', '￥1,299' and '₹1,29,999.00' style prices
+    """
+    if price_text is None:
+        return None
+    if isinstance(price_text, (int, float)):
+        return float(price_text)
+
+    number_pattern = LAKH_NUMBER_PATTERN if marketplace and marketplace.get('lakh_grouping') else NUMBER_PATTERN
+    match = number_pattern.search(str(price_text))
+    if not match:
+        return None
+    number = re.sub(r'\s', '', match.group(0))
+
+    decimal = marketplace['decimal'] if marketplace else _guess_decimal(number)
+    thousands = ',' if decimal == '.' else '.'
+    number = number.replace(thousands, '').replace(decimal, '.')
+
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def parse_rating(rating_text, marketplace=None):
+    """
+    Parse a rating like '4.5 out of 5 stars' or '5つ星のうち4.5' into a float
+    Review counts ('12,345 ratings') and anything above the 5 star scale return None
+    """
+    if not rating_text:
+        return None
+    rating_text = str(rating_text)
+    if not is_rating_text(rating_text, marketplace) or is_review_text(rating_text, marketplace):
+        return None
+    numbers = RATING_NUMBER_PATTERN.findall(rating_text)
+    if not numbers:
+        return None
+    number = numbers[-1] if marketplace and marketplace.get('rating_last') else numbers[0]
+    rating = float(number.replace(',', '.'))
+    return rating if 0 <= rating <= RATING_SCALE else None
+
+
+def convert_price(amount, currency, base=None):
+    """Convert an amount to the base currency using the cached rate table"""
+    if amount is None:
+        return None
+    rates = load_exchange_rates()
+    base = base or rates['base']
+    if currency == base:
+        return round(amount, 2)
+    if currency not in rates['rates'] or base not in rates['rates']:
+        return None
+    return round(amount / rates['rates'][currency] * rates['rates'][base], 2)
+
+
+def load_exchange_rates():
+    """Load the exchange rate table once and keep it in memory"""
+    global _exchange_rates
+    if _exchange_rates is None:
+        with open(EXCHANGE_RATES_FILE, 'r', encoding='utf-8') as f:
+            _exchange_rates = json.load(f)
+    return _exchange_rates
+
+
+def _guess_decimal(number):
+    """Guess the decimal separator when the marketplace is unknown"""
+    last_separator = max(number.rfind('.'), number.rfind(','))
+    if last_separator == -1:
+        return '.'
+    # A separator followed by exactly three digits is a thousands separator
+    if len(number) - last_separator - 1 == 3:
+        return ',' if number[last_separator] == '.' else '.'
+    return number[last_separator]
@@ -21,6 +21,9 @@ function loadAndDisplayProducts() {
         .then(data => {
             if (data.success) {
                 displayProducts(data.products);
+                if (data.products.length > 0) {
+                    loadComparisonSummary();
+                }
             } else {
                 contentDiv.innerHTML = '<div class="error">Failed to load products from server</div>';
             }
@@ -53,6 +56,7 @@ function displayProducts(products) {
     }
 
     let html = `
+        <div id="comparison-summary"></div>
         <div class="comparison-table">
             <div class="table-header">
                 <h2>Comparing ${products.length} Product${products.length > 1 ? 's' : ''}</h2>
@@ -62,11 +66,13 @@ function displayProducts(products) {
     `;
 
     products.forEach(product => {
+        // Prefer the locally cached thumbnail over Amazon's full-size image
+        const imageUrl = product.image_local ? `${API_BASE_URL}${product.image_local}?size=medium` : product.image;
         html += `
             <div class="product-column">
                 <div class="product-image-container">
-                    ${product.image ? 
-                        `<img src="${product.image}" alt="${product.title}" class="product-image" onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
+                    ${imageUrl ? 
+                        `<img src="${imageUrl}" alt="${product.title}" class="product-image" onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
                          <div class="no-image" style="display:none;">No Image Available</div>` :
                         `<div class="no-image">No Image Available</div>`
                     }
@@ -101,6 +107,62 @@ function displayProducts(products) {
     contentDiv.innerHTML = html;
 }
 
+function loadComparisonSummary() {
+    // Rankings and price drops are precomputed by the server
+    fetch(`${API_BASE_URL}/api/compare?limit=1`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                displayComparisonSummary(data);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading comparison summary:', error);
+        });
+}
+
+function displayComparisonSummary(data) {
+    const summaryDiv = document.getElementById('comparison-summary');
+    if (!summaryDiv) return;
+
+    const highlights = [
+        { label: 'Cheapest', product: data.cheapest[0] },
+        { label: 'Best Rated', product: data.best_rated[0] },
+        { label: 'Best Value', product: data.best_value[0] }
+    ].filter(highlight => highlight.product);
+
+    let html = '<div class="summary-grid">';
+    highlights.forEach(highlight => {
+        html += `
+            <div class="summary-card">
+                <div class="summary-label">${highlight.label}</div>
+                <div class="summary-title">${escapeHtml(highlight.product.title || 'Unknown Product')}</div>
+                <div class="product-price">${escapeHtml(highlight.product.price || '')}</div>
+                ${highlight.product.ratings ? `<div class="product-ratings">${escapeHtml(highlight.product.ratings)}</div>` : ''}
+            </div>
+        `;
+    });
+    html += '</div>';
+
+    data.price_drops.forEach(alert => {
+        html += `
+            <div class="price-drop">
+                Price drop: ${escapeHtml(alert.title || 'Unknown Product')}
+                ${escapeHtml(formatAlertPrice(alert.old_display_price, alert.old_price, alert.base_currency))}
+                → ${escapeHtml(formatAlertPrice(alert.new_display_price, alert.new_price, alert.base_currency))}
+                (-${alert.drop_percent}%)
+            </div>
+        `;
+    });
+
+    summaryDiv.innerHTML = html;
+}
+
+function formatAlertPrice(displayPrice, basePrice, baseCurrency) {
+    // Prefer the price as shown on Amazon, falling back to the normalized value
+    return displayPrice || `${basePrice} ${baseCurrency || ''}`.trim();
+}
+
 function escapeHtml(text) {
     if (!text) return '';
     const div = document.createElement('div');
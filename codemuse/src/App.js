@@ -193,7 +193,10 @@ function App() {
                 <div key={product.id} className="product-card">
                   <div className="product-image">
                     {product.image ? (
-                      <img src={product.image} alt={product.title} />
+                      <img
+                        src={product.image_local ? `${API_BASE_URL}${product.image_local}?size=thumb` : product.image}
+                        alt={product.title}
+                      />
                     ) : (
                       <div className="no-image">No Image</div>
                     )}
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Structured-data extraction for Amazon product pages
+Scans the raw page bytes for embedded JSON-LD, a-state and image/twister blobs
+so most fields can be read without building a BeautifulSoup tree
+"""
+
+import html
+import json
+import re
+
+# Fast tokenizer patterns - these run directly over the response bytes
+SCRIPT_PATTERN = re.compile(rb'<script\b([^>]*)>(.*?)</script\s*>', re.S | re.I)
+LD_JSON_PATTERN = re.compile(rb'type\s*=\s*["\']application/ld\+json["\']', re.I)
+A_STATE_PATTERN = re.compile(rb'data-a-state\s*=\s*(["\'])(.*?)\1', re.S)
+DYNAMIC_IMAGE_PATTERN = re.compile(rb'data-a-dynamic-image\s*=\s*(["\'])(.*?)\1', re.S)
+HIRES_IMAGE_PATTERN = re.compile(rb'"(?:hiRes|large)"\s*:\s*"(https?://[^"]+)"')
+CURRENT_ASIN_PATTERN = re.compile(
+    rb'(?:"currentAsin"\s*:\s*"|name="ASIN"\s+value=")([A-Z0-9]{10})"'
+)
+
+# a-state blobs that describe the page's own product (buybox/twister) rather
+# than carousels and other widgets
+PRODUCT_STATE_KEYS = ('twister', 'desktop-twister', 'buybox', 'turbo-checkout')
+
+CURRENCY_SYMBOLS = {
+    'USD': '$',
+    'CAD': '$',
+    'AUD': '$',
+    'GBP': '£',
+    'EUR': '€',
+    'JPY': '¥',
+}
+
+MAX_DESCRIPTION_LENGTH = 500
+
+
+def extract_structured_data(content):
+    """
+    Extract product fields from embedded structured data
+    Returns a dictionary holding only the fields that were found
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+
+    # The page's own ASIN decides which offer/variant price belongs to the product
+    current_asin_match = CURRENT_ASIN_PATTERN.search(content)
+    current_asin = current_asin_match.group(1).decode('ascii') if current_asin_match else None
+
+    ld_nodes = []
+    a_states = []
+    for attrs, body in SCRIPT_PATTERN.findall(content):
+        if LD_JSON_PATTERN.search(attrs):
+            ld_nodes.extend(_product_nodes(_load_json(body)))
+            continue
+        a_state_match = A_STATE_PATTERN.search(attrs)
+        if a_state_match:
+            state = _load_json(body)
+            if state is not None:
+                a_states.append((_a_state_key(a_state_match.group(2)), state))
+
+    data = {'asin': current_asin} if current_asin else {}
+    for node in ld_nodes:
+        _merge(data, _fields_from_ld(node, current_asin))
+    for key, state in a_states:
+        _merge(data, _fields_from_a_state(state, key, current_asin))
+
+    images = data.get('images', []) + _dynamic_images(content) + _twister_images(content)
+    images = _unique(images)
+    if images:
+        data['images'] = images
+        data.setdefault('image', images[0])
+
+    return data
+
+
+def _load_json(raw, unescape=False):
+    """Decode a JSON blob, returning None if it is not valid JSON"""
+    text = raw.decode('utf-8', errors='replace')
+    if unescape:
+        # Attribute values arrive HTML-escaped (&quot; etc.)
+        text = html.unescape(text)
+    try:
+        return json.loads(text.strip())
+    except ValueError:
+        return None
+
+
+def _a_state_key(raw):
+    """The 'key' named in a data-a-state attribute, e.g. 'turbo-checkout-page-state'"""
+    attribute = _load_json(raw, unescape=True)
+    return str(attribute.get('key', '')) if isinstance(attribute, dict) else ''
+
+
+def _product_nodes(document):
+    """Yield every schema.org Product node in a JSON-LD document"""
+    if isinstance(document, list):
+        for item in document:
+            yield from _product_nodes(item)
+    elif isinstance(document, dict):
+        node_type = document.get('@type')
+        types = node_type if isinstance(node_type, list) else [node_type]
+        if 'Product' in types:
+            yield document
+        if '@graph' in document:
+            yield from _product_nodes(document['@graph'])
+
+
+def _fields_from_ld(node, current_asin=None):
+    """Map a JSON-LD Product node onto the scraper's field names"""
+    fields = {}
+
+    if node.get('name'):
+        fields['title'] = html.unescape(str(node['name'])).strip()
+
+    description = node.get('description')
+    if description:
+        fields['description'] = _truncate(html.unescape(str(description)).strip())
+
+    asin = node.get('asin') or node.get('sku') or node.get('productID')
+    if asin:
+        fields['asin'] = str(asin)
+
+    images = []
+    for image in _as_list(node.get('image')):
+        if isinstance(image, dict):
+            image = image.get('contentUrl') or image.get('url')
+        if isinstance(image, str) and image.startswith('http'):
+            images.append(image)
+    if images:
+        fields['images'] = images
+
+    rating = node.get('aggregateRating')
+    if isinstance(rating, dict) and rating.get('ratingValue') is not None:
+        best = rating.get('bestRating', 5)
+        # Decimal-comma marketplaces may write the value as "4,5"
+        rating_value = str(rating['ratingValue']).replace(',', '.')
+        fields['ratings'] = f"{rating_value} out of {best} stars"
+        try:
+            fields['rating_value'] = float(rating_value)
+        except ValueError:
+            pass
+
+    variant_prices = []
+    offers = [offer for offer in _as_list(node.get('offers')) if isinstance(offer, dict)]
+    # Offers for the current variant come first, then the rest in page order
+    offers.sort(key=lambda offer: str(offer.get('asin') or offer.get('sku')) != current_asin)
+    for offer in offers:
+        currency = offer.get('priceCurrency', '')
+        price = offer.get('price', offer.get('lowPrice'))
+        if price is None:
+            continue
+        display_price = _format_price(price, currency)
+        if 'price' not in fields:
+            fields['price'] = display_price
+            fields.update(_price_value(price, currency))
+        if offer.get('sku') or offer.get('asin'):
+            variant_prices.append({
+                'asin': str(offer.get('asin') or offer.get('sku')),
+                'price': display_price
+            })
+    if variant_prices:
+        fields['variant_prices'] = variant_prices
+
+    return fields
+
+
+def _fields_from_a_state(state, key, current_asin=None):
+    """
+    Pull prices and ASINs out of an a-state JSON blob
+    Only the current ASIN's entry, or entries in the product's own buybox/twister
+    state, set the price - variant prices come from buybox/twister state only, so
+    carousels and sponsored widgets are ignored
+    """
+    fields = {}
+    variant_prices = []
+    is_product_state = key.startswith(PRODUCT_STATE_KEYS)
+
+    for item in _walk_dicts(state):
+        display_price = item.get('displayPrice')
+        if not isinstance(display_price, str):
+            display_price = None
+        if not display_price and item.get('priceAmount') is not None:
+            display_price = _format_price(item['priceAmount'], item.get('currencyCode', ''))
+        if not display_price:
+            continue
+        asin = str(item.get('asin') or item.get('ASIN') or '')
+        if asin and is_product_state:
+            variant_prices.append({'asin': asin, 'price': display_price})
+
+        if current_asin:
+            is_product_price = asin == current_asin or (not asin and is_product_state)
+        else:
+            is_product_price = is_product_state
+        if is_product_price and 'price' not in fields:
+            fields['price'] = display_price
+            if item.get('priceAmount') is not None:
+                fields.update(_price_value(item['priceAmount'], item.get('currencyCode', '')))
+            if asin:
+                fields['asin'] = asin
+
+    if variant_prices:
+        fields['variant_prices'] = variant_prices
+
+    return fields
+
+
+def _dynamic_images(content):
+    """Image URLs from data-a-dynamic-image attributes, largest first"""
+    images = []
+    for _, raw in DYNAMIC_IMAGE_PATTERN.findall(content):
+        sizes = _load_json(raw, unescape=True)
+        if not isinstance(sizes, dict):
+            continue
+        ranked = sorted(
+            sizes.items(),
+            key=lambda entry: entry[1][0] * entry[1][1] if _is_size(entry[1]) else 0,
+            reverse=True
+        )
+        images.extend(url for url, _ in ranked)
+    return images
+
+
+def _twister_images(content):
+    """High resolution image URLs from the ImageBlock/twister JS data"""
+    return [url.decode('utf-8', errors='replace') for url in HIRES_IMAGE_PATTERN.findall(content)]
+
+
+def _merge(data, fields):
+    """Merge newly found fields without overwriting earlier sources"""
+    price_known = 'price' in data
+    for key, value in fields.items():
+        if price_known and key in ('price_value', 'currency'):
+            # Keep the numeric price paired with the display price it came from
+            continue
+        if key == 'images':
+            data[key] = data.get(key, []) + value
+        elif key == 'variant_prices':
+            known = {variant['asin'] for variant in data.get(key, [])}
+            data[key] = data.get(key, []) + [v for v in value if v['asin'] not in known]
+        else:
+            data.setdefault(key, value)
+
+
+def _walk_dicts(value):
+    """Yield every dictionary nested inside a decoded JSON value"""
+    if isinstance(value, dict):
+        yield value
+        for child in value.values():
+            yield from _walk_dicts(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _walk_dicts(child)
+
+
+def _format_price(amount, currency):
+    """Render a numeric price the way Amazon displays it"""
+    try:
+        amount = f"{float(amount):.2f}"
+    except (TypeError, ValueError):
+        amount = str(amount)
+    symbol = CURRENCY_SYMBOLS.get(currency)
+    if symbol:
+        return f"{symbol}{amount}"
+    return f"{amount} {currency}".strip()
+
+
+def _price_value(amount, currency):
+    """Numeric price and currency code, so callers needn't re-parse the display string"""
+    fields = {}
+    try:
+        fields['price_value'] = float(amount)
+    except (TypeError, ValueError):
+        return fields
+    if currency:
+        fields['currency'] = currency
+    return fields
+
+
+def _truncate(text):
+    """Limit descriptions to the same length as the DOM scraper"""
+    if len(text) > MAX_DESCRIPTION_LENGTH:
+        return text[:MAX_DESCRIPTION_LENGTH] + '...'
+    return text
+
+
+def _as_list(value):
+    """Normalise a JSON-LD value that may be a single item or a list"""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _is_size(value):
+    """Check for a [width, height] pair"""
+    return isinstance(value, list) and len(value) == 2 and all(isinstance(v, (int, float)) for v in value)
+
+
+def _unique(items):
+    """Remove duplicates while keeping the original order"""
+    seen = set()
+    result = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            result.append(item)
+    return result
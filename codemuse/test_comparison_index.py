@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Tests for the incrementally maintained comparison index
+Run with: python -m pytest test_comparison_index.py
+"""
+
+import random
+
+from comparison_index import ComparisonIndex
+
+
+def make_product(product_id, price, rating, domain='www.amazon.com'):
+    return {
+        'id': product_id,
+        'title': f'Product {product_id}',
+        'price': None if price is None else f'${price:.2f}',
+        'ratings': None if rating is None else f'{rating} out of 5 stars',
+        'price_base': price,
+        'rating_value': rating,
+        'domain': domain,
+        'url': f'https://{domain}/dp/{product_id}'
+    }
+
+
+def rebuilt(products):
+    """Index the same products from scratch, for comparing against incremental updates"""
+    index = ComparisonIndex()
+    for product in products:
+        index.add(product)
+    return index
+
+
+def assert_consistent(index, products):
+    actual = index.compare(limit=len(products) + 1)
+    expected = rebuilt(products).compare(limit=len(products) + 1)
+    assert actual['products_count'] == len(products)
+    for view in ('cheapest', 'best_rated', 'best_value'):
+        assert [entry['id'] for entry in actual[view]] == [entry['id'] for entry in expected[view]]
+    assert actual['domains'] == expected['domains']
+
+
+def test_rankings():
+    index = ComparisonIndex()
+    index.add(make_product('a', 30.0, 4.0))
+    index.add(make_product('b', 10.0, 3.0))
+    index.add(make_product('c', 20.0, 5.0))
+    index.add(make_product('d', None, None))
+
+    result = index.compare()
+    assert [entry['id'] for entry in result['cheapest']] == ['b', 'c', 'a']
+    assert [entry['id'] for entry in result['best_rated']] == ['c', 'a', 'b']
+    assert [entry['id'] for entry in result['best_value']] == ['b', 'c', 'a']
+    assert result['products_count'] == 4
+    assert [entry['id'] for entry in index.compare(limit=1)['cheapest']] == ['b']
+    assert index.compare(limit=0)['cheapest'] == []
+
+
+def test_domain_stats():
+    index = ComparisonIndex()
+    index.add(make_product('a', 10.0, 4.0))
+    index.add(make_product('b', 30.0, None))
+    index.add(make_product('c', 50.0, 3.0, domain='www.amazon.co.uk'))
+
+    domains = index.compare()['domains']
+    assert domains['www.amazon.com'] == {
+        'count': 2, 'min_price': 10.0, 'max_price': 30.0, 'avg_price': 20.0, 'avg_rating': 4.0
+    }
+    assert domains['www.amazon.co.uk']['count'] == 1
+
+
+def test_remove_drops_empty_domains():
+    index = ComparisonIndex()
+    index.add(make_product('a', 10.0, 4.0))
+    index.add(make_product('b', 50.0, 3.0, domain='www.amazon.co.uk'))
+    index.remove('b')
+    index.remove('missing')
+
+    result = index.compare()
+    assert list(result['domains']) == ['www.amazon.com']
+    assert [entry['id'] for entry in result['cheapest']] == ['a']
+
+
+def test_add_replaces_existing_entry():
+    index = ComparisonIndex()
+    index.add(make_product('a', 10.0, 4.0))
+    index.add(make_product('a', 20.0, 4.0))
+    assert_consistent(index, [make_product('a', 20.0, 4.0)])
+
+
+def test_refresh_records_and_clears_price_drops():
+    index = ComparisonIndex()
+    index.add(make_product('a', 40.0, 4.0))
+    index.add(make_product('b', 30.0, 4.0))
+
+    index.refresh(make_product('a', 20.0, 4.0))
+    result = index.compare()
+    assert [entry['id'] for entry in result['cheapest']] == ['a', 'b']
+    [alert] = result['price_drops']
+    assert alert['id'] == 'a'
+    assert alert['old_price'] == 40.0
+    assert alert['new_price'] == 20.0
+    assert alert['drop'] == 20.0
+    assert alert['drop_percent'] == 50.0
+    assert alert['old_display_price'] == '$40.00'
+    assert alert['base_currency'] == result['base_currency']
+
+    index.refresh(make_product('a', 25.0, 4.0))
+    assert index.compare()['price_drops'] == []
+
+
+def test_refresh_of_removed_product_is_ignored():
+    index = ComparisonIndex()
+    index.add(make_product('a', 40.0, 4.0))
+    index.remove('a')
+    index.refresh(make_product('a', 20.0, 4.0))
+
+    result = index.compare()
+    assert result['products_count'] == 0
+    assert result['cheapest'] == []
+    assert result['domains'] == {}
+    assert result['price_drops'] == []
+
+
+def test_clear():
+    index = ComparisonIndex()
+    index.add(make_product('a', 40.0, 4.0))
+    index.refresh(make_product('a', 20.0, 4.0))
+    index.clear()
+
+    result = index.compare()
+    assert result['products_count'] == 0
+    assert result['domains'] == {}
+    assert result['price_drops'] == []
+
+
+def test_falls_back_to_display_strings():
+    index = ComparisonIndex()
+    index.add({
+        'id': 'a',
+        'price': '$1,299.99',
+        'ratings': '4.5 out of 5 stars',
+        'domain': 'www.amazon.com'
+    })
+    [entry] = index.compare()['cheapest']
+    assert entry['price_value'] == 1299.99
+    assert entry['rating_value'] == 4.5
+
+
+def test_random_changes_stay_consistent():
+    rng = random.Random(1234)
+    domains = ['www.amazon.com', 'www.amazon.co.uk', 'www.amazon.de']
+    index = ComparisonIndex()
+    products = {}
+
+    def random_product(product_id):
+        # Repeated prices and ratings exercise ties in the sorted lists
+        price = rng.choice([None, 5.0, 9.99, 9.99, 20.0, 49.5])
+        rating = rng.choice([None, 3.0, 4.5, 4.5, 5.0])
+        return make_product(product_id, price, rating, rng.choice(domains))
+
+    for _ in range(500):
+        product_id = str(rng.randrange(20))
+        action = rng.random()
+        if action < 0.4:
+            products[product_id] = random_product(product_id)
+            index.add(products[product_id])
+        elif action < 0.7:
+            product = random_product(product_id)
+            index.refresh(product)
+            if product_id in products:
+                products[product_id] = product
+        elif action < 0.98:
+            products.pop(product_id, None)
+            index.remove(product_id)
+        else:
+            products.clear()
+            index.clear()
+        assert_consistent(index, list(products.values()))
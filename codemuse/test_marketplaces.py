@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for marketplace price and rating parsing
+Run with: python -m pytest test_marketplaces.py
+"""
+
+import pytest
+
+from marketplaces import get_marketplace, get_price_pattern, parse_price, parse_rating
+
+
+@pytest.mark.parametrize('host, price_text, expected', [
+    ('www.amazon.com', '$1,299.99', 1299.99),
+    ('www.amazon.com', '$29.99', 29.99),
+    ('www.amazon.ca', '$1,049.00', 1049.0),
+    ('www.amazon.co.uk', '£12.50', 12.5),
+    ('www.amazon.com.au', '$1,299.00', 1299.0),
+    ('www.amazon.in', '₹1,29,999.00', 129999.0),
+    ('www.amazon.in', '₹12,34,56,789', 123456789.0),
+    ('www.amazon.in', '₹999', 999.0),
+    ('www.amazon.de', '1.299,00 €', 1299.0),
+    ('www.amazon.de', '19,99 €', 19.99),
+    ('www.amazon.fr', '1 299,00 €', 1299.0),
+    ('www.amazon.fr', '1\u202f299,00\u00a0€', 1299.0),
+    ('www.amazon.it', '1.299,00 €', 1299.0),
+    ('www.amazon.es', '49,95 €', 49.95),
+    ('www.amazon.nl', '€ 1.299,00', 1299.0),
+    ('www.amazon.co.jp', '￥1,299', 1299.0),
+    ('www.amazon.co.jp', '¥12,800', 12800.0),
+    ('www.amazon.com.mx', '$1,299.00', 1299.0),
+    ('www.amazon.com.br', 'R$ 2.499,90', 2499.9),
+])
+def test_parse_price(host, price_text, expected):
+    assert parse_price(price_text, get_marketplace(host)) == expected
+
+
+@pytest.mark.parametrize('price_text, expected', [
+    ('$1,299.99', 1299.99),
+    ('1.299,00 €', 1299.0),
+    ('19,99 €', 19.99),
+    ('$1,299', 1299.0),
+])
+def test_parse_price_without_marketplace(price_text, expected):
+    assert parse_price(price_text) == expected
+
+
+def test_parse_price_not_found():
+    assert parse_price('Price not found', get_marketplace('www.amazon.com')) is None
+    assert parse_price(None) is None
+
+
+def test_price_pattern_matches_lakh_grouping():
+    match = get_price_pattern(get_marketplace('www.amazon.in')).search('Deal: ₹1,29,999.00 incl. tax')
+    assert match.group(0) == '₹1,29,999.00'
+
+
+@pytest.mark.parametrize('host, rating_text, expected', [
+    ('www.amazon.com', '4.5 out of 5 stars', 4.5),
+    ('www.amazon.ca', '3.9 out of 5 stars', 3.9),
+    ('www.amazon.co.uk', '4.0 out of 5 stars', 4.0),
+    ('www.amazon.in', '4.2 out of 5 stars', 4.2),
+    ('www.amazon.de', '4,6 von 5 Sternen', 4.6),
+    ('www.amazon.fr', '4,3 sur 5 étoiles', 4.3),
+    ('www.amazon.it', '4,1 su 5 stelle', 4.1),
+    ('www.amazon.es', '4,4 de 5 estrellas', 4.4),
+    ('www.amazon.nl', '4,7 van de 5 sterren', 4.7),
+    ('www.amazon.co.jp', '5つ星のうち4.2', 4.2),
+    ('www.amazon.com.mx', '4.8 de 5 estrellas', 4.8),
+    ('www.amazon.com.br', '4,5 de 5 estrelas', 4.5),
+])
+def test_parse_rating(host, rating_text, expected):
+    assert parse_rating(rating_text, get_marketplace(host)) == expected
+
+
+@pytest.mark.parametrize('host, review_text', [
+    ('www.amazon.com', '12,345 ratings'),
+    ('www.amazon.de', '1.234 Sternebewertungen'),
+    ('www.amazon.fr', '1 234 évaluations'),
+    ('www.amazon.co.jp', '1,234個の評価'),
+])
+def test_parse_rating_ignores_review_counts(host, review_text):
+    assert parse_rating(review_text, get_marketplace(host)) is None
+
+
+def test_parse_rating_rejects_values_above_scale():
+    assert parse_rating('12 out of 5 stars', get_marketplace('www.amazon.com')) is None
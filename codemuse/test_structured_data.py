@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for structured-data extraction from product pages
+Run with: python -m pytest test_structured_data.py
+"""
+
+import json
+
+from structured_data import extract_structured_data
+
+
+def ld_script(document):
+    return f'<script type="application/ld+json">{json.dumps(document)}</script>'
+
+
+def a_state_script(key, state):
+    return (
+        f'<script type="a-state" data-a-state=\'{{"key":"{key}"}}\'>'
+        f'{json.dumps(state)}</script>'
+    )
+
+
+def page(*parts):
+    return ('<html><body>' + ''.join(parts) + '</body></html>').encode('utf-8')
+
+
+CURRENT_ASIN = '<script>P.register("twister-js-init", {"currentAsin":"B000000002"});</script>'
+
+TWISTER_STATE = a_state_script('desktop-twister-state', {
+    'variants': [
+        {'asin': 'B000000001', 'displayPrice': '$89.00'},
+        {'asin': 'B000000002', 'displayPrice': '$99.00', 'priceAmount': 99, 'currencyCode': 'USD'}
+    ]
+})
+
+CAROUSEL_STATE = a_state_script('sp-carousel-state', {
+    'cards': [{'asin': 'B0SPONSOR1', 'displayPrice': '$5.00'}]
+})
+
+
+def test_current_asin_sets_price_and_asin():
+    data = extract_structured_data(page(CAROUSEL_STATE, CURRENT_ASIN, TWISTER_STATE))
+    assert data['asin'] == 'B000000002'
+    assert data['price'] == '$99.00'
+    assert data['price_value'] == 99.0
+    assert data['currency'] == 'USD'
+
+
+def test_buybox_asin_input_is_current_asin():
+    buybox = '<input type="hidden" name="ASIN" value="B000000001">'
+    data = extract_structured_data(page(buybox, TWISTER_STATE))
+    assert data['asin'] == 'B000000001'
+    assert data['price'] == '$89.00'
+
+
+def test_carousel_entries_are_not_variants():
+    data = extract_structured_data(page(CAROUSEL_STATE, CURRENT_ASIN, TWISTER_STATE))
+    assert [variant['asin'] for variant in data['variant_prices']] == ['B000000001', 'B000000002']
+
+
+def test_carousel_only_page_has_no_price():
+    data = extract_structured_data(page(CURRENT_ASIN, CAROUSEL_STATE))
+    assert 'price' not in data
+    assert 'variant_prices' not in data
+
+
+def test_product_state_price_without_current_asin():
+    buybox = a_state_script('buybox-state', {'displayPrice': '$42.00'})
+    data = extract_structured_data(page(CAROUSEL_STATE, buybox))
+    assert data['price'] == '$42.00'
+
+
+def test_non_string_display_price_is_ignored():
+    buybox = a_state_script('buybox-state', {'displayPrice': {'amount': 3}})
+    assert 'price' not in extract_structured_data(page(buybox))
+
+    buybox = a_state_script('buybox-state', {
+        'displayPrice': {'amount': 3}, 'priceAmount': 3, 'currencyCode': 'USD'
+    })
+    assert extract_structured_data(page(buybox))['price'] == '$3.00'
+
+
+def test_json_ld_graph_product():
+    document = {
+        '@context': 'https://schema.org',
+        '@graph': [
+            {'@type': 'BreadcrumbList', 'name': 'Electronics'},
+            {
+                '@type': ['Product', 'Thing'],
+                'name': 'Noise Cancelling Headphones &amp; Case',
+                'sku': 'B000000009',
+                'image': [{'@type': 'ImageObject', 'contentUrl': 'https://m.media-amazon.com/images/I/a.jpg'}],
+                'aggregateRating': {'ratingValue': 4.6, 'reviewCount': 120},
+                'offers': {'@type': 'Offer', 'price': '249.99', 'priceCurrency': 'USD'}
+            }
+        ]
+    }
+    data = extract_structured_data(page(ld_script(document)))
+    assert data['title'] == 'Noise Cancelling Headphones & Case'
+    assert data['asin'] == 'B000000009'
+    assert data['image'] == 'https://m.media-amazon.com/images/I/a.jpg'
+    assert data['price'] == '$249.99'
+    assert data['price_value'] == 249.99
+    assert data['rating_value'] == 4.6
+
+
+def test_json_ld_offers_prefer_current_asin():
+    document = {
+        '@type': 'Product',
+        'name': 'Shirt',
+        'offers': [
+            {'sku': 'B000000001', 'price': 10, 'priceCurrency': 'GBP'},
+            {'sku': 'B000000002', 'price': 12, 'priceCurrency': 'GBP'}
+        ]
+    }
+    data = extract_structured_data(page(CURRENT_ASIN, ld_script(document)))
+    assert data['asin'] == 'B000000002'
+    assert data['price'] == '£12.00'
+    assert data['price_value'] == 12.0
+    assert {variant['asin'] for variant in data['variant_prices']} == {'B000000001', 'B000000002'}
+
+
+def test_json_ld_aggregate_offer_low_price():
+    document = {
+        '@type': 'Product',
+        'name': 'Lamp',
+        'offers': {'@type': 'AggregateOffer', 'lowPrice': 19.5, 'priceCurrency': 'EUR'}
+    }
+    assert extract_structured_data(page(ld_script(document)))['price'] == '€19.50'
+
+
+def test_json_ld_decimal_comma_rating():
+    document = {'@type': 'Product', 'name': 'Lampe', 'aggregateRating': {'ratingValue': '4,5'}}
+    data = extract_structured_data(page(ld_script(document)))
+    assert data['rating_value'] == 4.5
+    assert data['ratings'] == '4.5 out of 5 stars'
+
+
+def test_invalid_json_ld_is_skipped():
+    broken = '<script type="application/ld+json">{"@type": "Product", </script>'
+    buybox = a_state_script('buybox-state', {'displayPrice': '$42.00'})
+    assert extract_structured_data(page(broken, buybox)) == {'price': '$42.00'}
+
+
+def test_variant_prices_are_deduplicated_across_sources():
+    document = {
+        '@type': 'Product',
+        'offers': [{'sku': 'B000000001', 'price': 89, 'priceCurrency': 'USD'}]
+    }
+    data = extract_structured_data(page(CURRENT_ASIN, ld_script(document), TWISTER_STATE))
+    assert [variant['asin'] for variant in data['variant_prices']] == ['B000000001', 'B000000002']